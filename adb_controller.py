@@ -6,20 +6,56 @@ UPDATED: Fixed swipe_with_hold to prevent fling
 """
 
 import subprocess
+import struct
+import threading
+import queue
 import cv2
 import numpy as np
 import time
-from PIL import Image
+import zlib
 import io
+import adb_socket
+
+# Raw screencap header: width, height, format (uint32 LE) - compiled once, parsed every frame
+_SCREENCAP_HDR = struct.Struct("<III")
+
+# Echoed after exec-out output - the exec service itself reports no exit status
+_EXEC_STATUS = b"__ADB_EXIT__"
+
+
+class FramebufferFormatError(Exception):
+    """Raw screencap isn't 4-byte RGBA (header/pixel format) - use PNG screenshots"""
 
 
 class ADBController:
     # Full path to adb.exe
     ADB_PATH = r"C:\platform-tools\adb.exe"
     
+    # 'adb devices' result is reused for this many seconds (device lookup +
+    # connection check in __init__, several controllers built in a row)
+    DEVICES_TTL = 2.0
+    _devices_cache = (0.0, None)
+    
+    # Max seconds one command may run in the persistent shell before the
+    # session is killed - a hung device command would block every caller
+    SHELL_TIMEOUT = 120
+    
     @staticmethod
-    def get_all_devices():
-        """Get list of all connected devices"""
+    def get_all_devices(max_age=None):
+        """
+        Get list of all connected devices
+        
+        Args:
+            max_age: Reuse a previous result up to this many seconds old
+                     (default DEVICES_TTL, 0 to always ask adb)
+        """
+        if max_age is None:
+            max_age = ADBController.DEVICES_TTL
+        
+        checked_at, cached = ADBController._devices_cache
+        if cached is not None and time.time() - checked_at < max_age:
+            return list(cached)
+        
         result = subprocess.run(
             [ADBController.ADB_PATH, "devices"],
             capture_output=True,
@@ -33,7 +69,8 @@ class ADBController:
                 device_id = line.split()[0]
                 devices.append(device_id)
         
-        return devices
+        ADBController._devices_cache = (time.time(), devices)
+        return list(devices)
     
     @staticmethod
     def get_connected_device():
@@ -103,8 +140,8 @@ class ADBController:
             
             time.sleep(0.5)
             
-            # Check if connection succeeded
-            devices = ADBController.get_all_devices()
+            # Check if connection succeeded (fresh list - the connect just changed it)
+            devices = ADBController.get_all_devices(max_age=0)
             if len(devices) > 0:
                 print(f"  ✓ Connected to {devices[0]}")
                 return devices[0]
@@ -151,6 +188,21 @@ class ADBController:
         self.device = device_id
         print(f"✓ ADB Controller initialized for device: {self.device}")
         
+        # Reused read buffer for screenshots (grows if a frame doesn't fit)
+        self._capture_buf = bytearray(16 << 20)
+        
+        # Persistent 'adb shell' for input commands (started on first use)
+        self._shell_proc = None
+        self._shell_lines = None
+        self._shell_lock = threading.Lock()
+        self._streams = []
+        
+        # Raw framebuffer screenshots (no PNG) - switched off if the device format isn't RGBA
+        self._raw_screencap = True
+        
+        # exec-out through the adb server socket - switched off if the server can't be reached
+        self._socket_exec = True
+        
         # Verify device is connected
         if not self._is_device_connected():
             raise ConnectionError(
@@ -173,6 +225,209 @@ class ADBController:
         )
         return result
     
+    def _start_shell(self):
+        """Start the persistent 'adb shell' and a thread queueing its output lines"""
+        proc = subprocess.Popen(
+            [self.ADB_PATH, "-s", self.device, "shell"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=0
+        )
+        lines = queue.Queue()
+        
+        # Pipes can't be read with a timeout on Windows - a thread reads them,
+        # _shell waits on the queue with one
+        def pump():
+            for line in iter(proc.stdout.readline, b""):
+                lines.put(line)
+            lines.put(None)  # EOF - shell exited
+        
+        threading.Thread(target=pump, daemon=True).start()
+        self._shell_proc, self._shell_lines = proc, lines
+    
+    def _shell(self, command):
+        """
+        Run a command through one long-lived 'adb shell' session
+        Saves spawning adb.exe + a new shell for every tap/swipe/key
+        Waits for an echoed end marker so calls stay synchronous
+        
+        Only sending the command is retried: once it was written it may have
+        run, so a lost reply raises instead of tapping/swiping a second time
+        
+        Returns:
+            CompletedProcess like _run_adb_command (stderr merged into stdout)
+        
+        Raises:
+            subprocess.TimeoutExpired: No end marker within SHELL_TIMEOUT (shell is killed)
+            BrokenPipeError: Shell exited before the end marker (e.g. 'exit' in the command)
+        """
+        marker = "__ADB_DONE__"
+        
+        with self._shell_lock:
+            sent = False
+            for _ in range(2):
+                try:
+                    if self._shell_proc is None or self._shell_proc.poll() is not None:
+                        self._start_shell()
+                    
+                    self._shell_proc.stdin.write(f"{{ {command}; }} 2>&1; echo {marker} $?\n".encode())
+                    self._shell_proc.stdin.flush()
+                    sent = True
+                    break
+                except (OSError, ValueError):
+                    # Shell died (device restart, adb server reset) - start a new one once
+                    self._shell_proc = None
+            
+            if sent:
+                return self._read_shell_reply(command, marker)
+        
+        # Persistent shell unusable - one-off adb call
+        return self._run_adb_command(["shell", command])
+    
+    def _read_shell_reply(self, command, marker):
+        """Collect output lines up to the end marker (caller holds _shell_lock)"""
+        deadline = time.time() + self.SHELL_TIMEOUT
+        output = []
+        
+        while True:
+            try:
+                line = self._shell_lines.get(timeout=max(deadline - time.time(), 0))
+            except queue.Empty:
+                proc, self._shell_proc = self._shell_proc, None
+                proc.kill()
+                raise subprocess.TimeoutExpired(command, self.SHELL_TIMEOUT)
+            
+            if line is None:
+                self._shell_proc = None
+                raise BrokenPipeError(f"adb shell closed before '{command}' finished")
+            
+            line = line.decode(errors="replace").rstrip("\r\n")
+            # Output without a trailing newline puts the marker mid-line
+            head, found, status = line.partition(marker)
+            if found:
+                if head:
+                    output.append(head)
+                return subprocess.CompletedProcess(command, int(status), "\n".join(output), "")
+            output.append(line)
+    
+    def close(self):
+        """
+        End the persistent 'adb shell' session (a new one starts on the next input)
+        and stop any scrcpy streams started by start_frame_stream
+        """
+        with self._shell_lock:
+            proc, self._shell_proc = self._shell_proc, None
+            streams, self._streams = self._streams, []
+        
+        for client in streams:
+            try:
+                client.stop()
+            except Exception:
+                pass
+        
+        if proc is None or proc.poll() is not None:
+            return
+        
+        try:
+            proc.stdin.close()  # EOF - the shell exits on its own
+            proc.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def __del__(self):
+        # __init__ may have failed before the shell attributes existed
+        if getattr(self, "_shell_lock", None) is not None:
+            self.close()
+    
+    def _exec_out(self, command):
+        """
+        Run 'adb exec-out <command>' and read stdout straight into a reused buffer
+        Avoids the full-size copies subprocess.run makes for multi-MB screenshots
+        Goes straight to the adb server socket (no adb.exe process per call),
+        falls back to the adb executable if that fails
+        
+        Returns:
+            memoryview of the bytes read (only valid until the next call)
+        """
+        script = f"{' '.join(command)}; echo {_EXEC_STATUS.decode()} $?"
+        
+        if self._socket_exec:
+            try:
+                with adb_socket.open_service(self.device, "exec:" + script) as sock:
+                    data = self._read_into_buffer(sock.recv_into)
+                return self._strip_exit_status(command, data)
+            except (OSError, adb_socket.AdbSocketError) as e:
+                print(f"⚠️ adb server socket unavailable ({e}), using adb exec-out")
+                self._socket_exec = False
+        
+        proc = subprocess.Popen(
+            [self.ADB_PATH, "-s", self.device, "exec-out", script],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        
+        data = self._read_into_buffer(proc.stdout.readinto)
+        
+        _, stderr = proc.communicate()
+        if proc.returncode != 0:
+            raise Exception(f"adb exec-out {' '.join(command)} failed: {stderr}")
+        
+        return self._strip_exit_status(command, data)
+    
+    def _strip_exit_status(self, command, data):
+        """
+        Split the echoed exit status off the end of exec-out output
+        
+        Raises:
+            Exception: Command failed on the device, or its output was cut off
+        """
+        tail = bytes(data[-32:])
+        pos = tail.rfind(_EXEC_STATUS)
+        if pos < 0:
+            raise Exception(f"{' '.join(command)}: output cut off (no exit status)")
+        
+        end = len(data) - len(tail) + pos
+        returncode = int(tail[pos + len(_EXEC_STATUS):])
+        if returncode != 0:
+            # stderr is merged into the output - show the start of it
+            message = bytes(data[:min(end, 200)]).decode(errors="replace").strip()
+            raise Exception(f"{' '.join(command)} failed on device (exit {returncode}): {message}")
+        
+        return data[:end]
+    
+    def _read_into_buffer(self, read_into):
+        """
+        Read a stream until EOF into the reused capture buffer
+        
+        Args:
+            read_into: readinto/recv_into of the stream
+        
+        Returns:
+            memoryview of the bytes read (only valid until the next call)
+        """
+        buf = self._capture_buf
+        n = 0
+        while True:
+            if n == len(buf):
+                # Full - grow into a fresh buffer (old one may still be referenced)
+                grown = bytearray(len(buf) * 2)
+                grown[:n] = buf
+                buf = self._capture_buf = grown
+            
+            chunk = read_into(memoryview(buf)[n:])
+            if not chunk:
+                break
+            n += chunk
+        
+        return memoryview(buf)[:n]
+    
     # ==================== INPUT CONTROL ====================
     
     def tap(self, x, y, delay=0.3):
@@ -185,7 +440,7 @@ class ADBController:
             delay: Delay after tap (seconds)
         """
         print(f"  [ADB] Tap at ({x}, {y})")
-        self._run_adb_command(["shell", "input", "tap", str(x), str(y)])
+        self._shell(f"input tap {x} {y}")
         time.sleep(delay)
     
     def swipe(self, x1, y1, x2, y2, duration=400, delay=0.5):
@@ -199,10 +454,7 @@ class ADBController:
             delay: Delay after swipe (seconds)
         """
         print(f"  [ADB] Swipe from ({x1}, {y1}) to ({x2}, {y2})")
-        self._run_adb_command([
-            "shell", "input", "swipe",
-            str(x1), str(y1), str(x2), str(y2), str(duration)
-        ])
+        self._shell(f"input swipe {x1} {y1} {x2} {y2} {duration}")
         time.sleep(delay)
     
     def swipe_with_hold(self, x1, y1, x2, y2, duration=400, hold_time=500, delay=0.5):
@@ -224,10 +476,7 @@ class ADBController:
         # Single slow swipe - total duration prevents fling
         total_duration = duration + hold_time
         
-        self._run_adb_command([
-            "shell", "input", "swipe",
-            str(x1), str(y1), str(x2), str(y2), str(total_duration)
-        ])
+        self._shell(f"input swipe {x1} {y1} {x2} {y2} {total_duration}")
         
         time.sleep(delay)
     
@@ -243,11 +492,25 @@ class ADBController:
             delay: Delay after swipe
         """
         print(f"  [ADB] Slow swipe from ({x1}, {y1}) to ({x2}, {y2})")
-        self._run_adb_command([
-            "shell", "input", "swipe",
-            str(x1), str(y1), str(x2), str(y2), str(duration)
-        ])
+        self._shell(f"input swipe {x1} {y1} {x2} {y2} {duration}")
+        time.sleep(delay)
+    
+    def shell_batch(self, script, delay=0.3):
+        """
+        Run several device-side commands as ONE shell script
+        Loops/sleeps run on the device, so N inputs cost one round trip
+        
+        Args:
+            script: sh script, e.g. 'for k in 1 2 3; do input keyevent 4; done'
+            delay: Delay after the whole script (seconds)
+        
+        Returns:
+            CompletedProcess (output + exit code of the script)
+        """
+        print(f"  [ADB] Batch: {script}")
+        result = self._shell(script)
         time.sleep(delay)
+        return result
     
     def press_key(self, keycode, delay=0.3):
         """
@@ -264,7 +527,7 @@ class ADBController:
             delay: Delay after keypress (seconds)
         """
         print(f"  [ADB] Press key {keycode}")
-        self._run_adb_command(["shell", "input", "keyevent", str(keycode)])
+        self._shell(f"input keyevent {keycode}")
         time.sleep(delay)
     
     def press_back(self, delay=0.3):
@@ -275,15 +538,37 @@ class ADBController:
         """Press Android HOME button"""
         self.press_key(3, delay)
     
+    def launch_app(self, package, restart=False, delay=0.3):
+        """
+        Start an app by package name (no icon coordinates needed)
+        Uses monkey with the LAUNCHER category, so no activity name is required
+        
+        Args:
+            package: Android package name
+            restart: Force-stop the app first so it opens on its start screen
+            delay: Delay after launch (seconds)
+        
+        Returns:
+            CompletedProcess of the launch command
+        """
+        print(f"  [ADB] Launch {package}" + (" (restart)" if restart else ""))
+        stop = f"am force-stop {package}; " if restart else ""
+        result = self._shell(f"{stop}monkey -p {package} -c android.intent.category.LAUNCHER 1")
+        time.sleep(delay)
+        return result
+    
     # ==================== SCREEN CAPTURE ====================
     
     def screenshot_raw(self):
         """
         Take screenshot and return as PIL Image
+        PIL is only imported here - every other capture path is OpenCV only
         
         Returns:
             PIL Image object
         """
+        from PIL import Image
+        
         result = subprocess.run(
             [self.ADB_PATH, "-s", self.device, "exec-out", "screencap", "-p"],
             capture_output=True
@@ -296,22 +581,79 @@ class ADBController:
         image = Image.open(io.BytesIO(result.stdout))
         return image
     
-    def screenshot_cv(self):
+    def screenshot_cv(self, step=1, region=None, dst=None):
         """
         Take screenshot and return as OpenCV image (BGR format)
+        Uses the raw framebuffer (no PNG encode/decode), PNG only as fallback
+        
+        Args:
+            step: Keep every step-th pixel in both directions (e.g. 8 for a
+                  cheap whole-screen check) - subsampled before color conversion
+            region: Optional (x, y, width, height) - only this part is converted
+            dst: Optional reused BGR buffer - written into when the shape matches
         
         Returns:
             numpy array (OpenCV BGR image)
         """
-        pil_image = self.screenshot_raw()
+        if self._raw_screencap:
+            try:
+                rgba = self.screenshot_framebuffer()
+                if region:
+                    x, y, width, height = region
+                    rgba = rgba[y:y+height, x:x+width]
+                rgba = rgba[::step, ::step]
+                
+                if dst is not None and dst.shape == rgba.shape[:2] + (3,):
+                    return cv2.cvtColor(rgba, cv2.COLOR_RGBA2BGR, dst=dst)
+                return cv2.cvtColor(rgba, cv2.COLOR_RGBA2BGR)
+            except FramebufferFormatError as e:
+                # Only a format mismatch is permanent - I/O errors go to the caller
+                print(f"⚠️ Raw screencap unavailable ({e}), using PNG screenshots")
+                self._raw_screencap = False
+        
+        png_data = self._exec_out(["screencap", "-p"])
+        
+        # Decode straight from the read buffer - imdecode already returns BGR
+        bgr_array = cv2.imdecode(np.frombuffer(png_data, dtype=np.uint8), cv2.IMREAD_COLOR)
         
-        # Convert PIL to OpenCV format
-        # PIL is RGB, OpenCV uses BGR
-        rgb_array = np.array(pil_image)
-        bgr_array = cv2.cvtColor(rgb_array, cv2.COLOR_RGB2BGR)
+        if bgr_array is None:
+            raise Exception("Screenshot failed: could not decode PNG data")
+        
+        if region:
+            x, y, width, height = region
+            bgr_array = bgr_array[y:y+height, x:x+width]
+        
+        if step > 1 or region:
+            bgr_array = np.ascontiguousarray(bgr_array[::step, ::step])
         
         return bgr_array
     
+    def screenshot_framebuffer(self):
+        """
+        Take screenshot as the raw framebuffer ('screencap' without -p)
+        No PNG encode on the device and no PNG decode here
+        
+        Returns:
+            numpy array (height, width, 4) RGBA - a view into the read buffer,
+            only valid until the next screenshot
+        """
+        raw = self._exec_out(["screencap"])
+        if len(raw) < _SCREENCAP_HDR.size:
+            raise FramebufferFormatError(f"screencap returned {len(raw)} bytes")
+        
+        # Header is width, height, format (+ colorspace on Android 9+)
+        width, height, pixel_format = _SCREENCAP_HDR.unpack_from(raw, 0)
+        header_size = len(raw) - width * height * 4
+        
+        # 12 bytes pre-Pie, 16 bytes on Pie+ - anything else is not 4 bytes/pixel
+        # Only RGBA_8888 (1) / RGBX_8888 (2) - BGRA_8888 (5) is also 4 bytes/pixel
+        # but would come out with red and blue swapped
+        if header_size not in (12, 16) or pixel_format not in (1, 2):
+            raise FramebufferFormatError(f"{width}x{height} format {pixel_format}, {len(raw)} bytes")
+        
+        pixels = np.frombuffer(raw, dtype=np.uint8, count=width * height * 4, offset=header_size)
+        return pixels.reshape(height, width, 4)
+    
     def screenshot_region(self, x, y, width, height):
         """
         Take screenshot and crop to specific region
@@ -323,12 +665,8 @@ class ADBController:
         Returns:
             OpenCV image (BGR) of the cropped region
         """
-        full_screenshot = self.screenshot_cv()
-        
-        # Crop the region
-        cropped = full_screenshot[y:y+height, x:x+width]
-        
-        return cropped
+        # Cropped before color conversion - only the region is converted
+        return self.screenshot_cv(region=(x, y, width, height))
     
     def save_screenshot(self, filename="screenshot.png"):
         """
@@ -337,10 +675,40 @@ class ADBController:
         Args:
             filename: Output filename
         """
-        image = self.screenshot_raw()
-        image.save(filename)
+        # BGR capture written by OpenCV - no PIL decode/re-encode
+        if not cv2.imwrite(filename, self.screenshot_cv()):
+            raise Exception(f"Could not write screenshot: {filename}")
         print(f"✓ Screenshot saved: {filename}")
     
+    def start_frame_stream(self, max_fps=5):
+        """
+        Start a scrcpy video stream (needs the optional scrcpy-client package)
+        The device encodes H.264 continuously, so the latest frame is always
+        at hand instead of one screencap round trip per check
+        
+        Args:
+            max_fps: Frame rate cap for the device-side encoder
+        
+        Returns:
+            Threaded scrcpy client (BGR frames in .last_frame), or None if unavailable
+            The stream runs until close()
+        """
+        try:
+            import scrcpy
+        except ImportError:
+            print("⚠️ scrcpy-client not installed, using ADB screenshots")
+            return None
+        
+        try:
+            client = scrcpy.Client(device=self.device, max_fps=max_fps)
+            client.start(threaded=True)
+            self._streams.append(client)  # stopped by close()
+            print("✓ scrcpy frame stream started")
+            return client
+        except Exception as e:
+            print(f"⚠️ scrcpy failed to start ({e}), using ADB screenshots")
+            return None
+    
     # ==================== UTILITY ====================
     
     def get_screen_size(self):
@@ -368,6 +736,45 @@ class ADBController:
         """Simple wait/sleep"""
         print(f"  [Wait] {seconds}s")
         time.sleep(seconds)
+    
+    def wait_until_stable(self, region=None, timeout=2.0, step=0.1, min_wait=0.0):
+        """
+        Wait until the screen stops changing (two identical captures in a row)
+        Use instead of a fixed sleep after a tap - returns as soon as the UI
+        has settled, and never waits longer than the old sleep (timeout)
+        
+        min_wait is slept first, so a screen the tap hasn't changed yet (or a
+        static loading frame right after it) can't count as settled
+        
+        Args:
+            region: Optional (x, y, width, height) to compare instead of the full screen
+            timeout: Max seconds to wait (min_wait included)
+            step: Seconds between captures
+            min_wait: Seconds to wait before the first capture
+        
+        Returns:
+            True if the screen settled, False on timeout
+        """
+        deadline = time.time() + timeout
+        time.sleep(min_wait)
+        
+        # Full screen: every 4th pixel is enough to see a transition and ~16x cheaper
+        sample = 1 if region else 4
+        last_hash = None
+        
+        while True:
+            frame = self.screenshot_cv(step=sample, region=region)
+            frame_hash = zlib.crc32(frame)
+            if frame_hash == last_hash:
+                return True
+            last_hash = frame_hash
+            
+            if time.time() + step >= deadline:
+                remaining = deadline - time.time()
+                if remaining > 0:
+                    time.sleep(remaining)
+                return False
+            time.sleep(step)
 
 
 # ==================== EXAMPLE USAGE ====================
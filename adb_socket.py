@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+ADB Socket - talks to the local adb server directly (smart-socket protocol)
+Used for per-frame commands like screencap so they don't start a new
+adb.exe process each time (tens of ms on Windows before any data moves)
+"""
+
+import os
+import socket
+
+
+ADB_SERVER_HOST = "127.0.0.1"
+ADB_SERVER_PORT = int(os.environ.get("ANDROID_ADB_SERVER_PORT", 5037))
+
+
+class AdbSocketError(Exception):
+    """adb server refused a request (FAIL reply or broken protocol)"""
+
+
+def _send_request(sock, request):
+    """Send one request framed as 4 hex digits of length + payload"""
+    payload = request.encode()
+    sock.sendall(b"%04x" % len(payload) + payload)
+
+
+def _recv_exact(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise AdbSocketError("adb server closed the connection")
+        data += chunk
+    return data
+
+
+def _read_status(sock, request):
+    """Wait for OKAY, raise with the server's message on FAIL"""
+    status = _recv_exact(sock, 4)
+    if status == b"OKAY":
+        return
+    if status == b"FAIL":
+        length = int(_recv_exact(sock, 4), 16)
+        message = _recv_exact(sock, length).decode(errors="replace")
+        raise AdbSocketError(f"{request}: {message}")
+    raise AdbSocketError(f"{request}: unexpected reply {status!r}")
+
+
+def open_service(device, service, timeout=10):
+    """
+    Open a device service through the adb server
+    
+    Args:
+        device: ADB device identifier (as in 'adb -s')
+        service: Device service, e.g. 'exec:screencap' (raw stdout, no pty)
+        timeout: Socket timeout in seconds
+    
+    Returns:
+        Connected socket - read the service output until it closes
+    """
+    sock = socket.create_connection((ADB_SERVER_HOST, ADB_SERVER_PORT), timeout=timeout)
+    try:
+        for request in (f"host:transport:{device}", service):
+            _send_request(sock, request)
+            _read_status(sock, request)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
@@ -14,12 +14,13 @@ from test_06_adb_victory_detection import BattleEndDetectorADB
 from test_07_adb_universal_reset import UniversalResetADB
 
 
-def run_infinite_battle_loop(device_id):
+def run_infinite_battle_loop(device_id, force_reset=False):
     """
     Run infinite battle loop for a specific device
     
     Args:
         device_id: ADB device identifier (e.g., 127.0.0.1:16416)
+        force_reset: Reset with BACK presses + app icon even if pokemon_package is configured
     """
     print(f"\n{'='*60}")
     print(f"[{device_id}] STARTING BOT INSTANCE")
@@ -90,7 +91,7 @@ def run_infinite_battle_loop(device_id):
         try:
             # STAGE 3: RESET TO MENU
             print(f"[{device_id}] [Stage 3/3] 🔄 Resetting to menu...")
-            universal_reset.run_universal_reset()
+            universal_reset.run_universal_reset(force_reset=force_reset)
             
             # Sync bot state after reset
             # After universal reset, game is at Beginner difficulty
@@ -118,10 +119,12 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Pokemon TCG Bot - Single Instance")
     parser.add_argument("--device", type=str, required=True, 
                         help="ADB Device ID (e.g., 127.0.0.1:16416)")
+    parser.add_argument("--force-reset", action="store_true",
+                        help="Reset with BACK presses + app icon even if pokemon_package is configured")
     args = parser.parse_args()
     
     try:
-        run_infinite_battle_loop(args.device)
+        run_infinite_battle_loop(args.device, force_reset=args.force_reset)
     except KeyboardInterrupt:
         print(f"\n[{args.device}] 🛑 Bot stopped by user")
     except Exception as e:
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Config Loader - one shared, cached reader for adb_config.json
+Every bot class used to open and parse the file on its own
+The parsed dict is kept per process and only re-read when the file changes
+"""
+
+import copy
+import json
+import os
+
+# orjson is optional - much faster parser/serializer, falls back to stdlib json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+CONFIG_FILE = "adb_config.json"
+
+# Parsed config, keyed by file mtime so a re-calibration (e.g. test_02 in another window) is picked up
+_CONFIG_CACHE = {}
+
+# Device id -> file name part, e.g. 127.0.0.1:16384 -> 127_0_0_1_16384
+_DEVICE_ID_SANITIZER = str.maketrans({":": "_", ".": "_"})
+
+
+def config_path_for(device_id=None):
+    """
+    Config file for a device (checked on every call, so a per-device file
+    written mid-run, e.g. by calibration, is used from then on)
+    
+    Returns:
+        adb_config_<device>.json if that device was calibrated separately,
+        else the shared adb_config.json
+    """
+    if device_id:
+        path = f"adb_config_{device_id.translate(_DEVICE_ID_SANITIZER)}.json"
+        if os.path.exists(path):
+            return path
+    return CONFIG_FILE
+
+
+def load_adb_config(filename=CONFIG_FILE):
+    """
+    Load calibrated coordinates (only re-parsed when the file changes)
+    
+    Returns:
+        config dict (a copy - changing it doesn't affect other callers), {} if missing
+    """
+    try:
+        mtime = os.path.getmtime(filename)
+        cached = _CONFIG_CACHE.get(filename)
+        if cached and cached[0] == mtime:
+            return copy.deepcopy(cached[1])
+        
+        with open(filename, 'rb') as f:
+            data = f.read()
+        config = orjson.loads(data) if orjson is not None else json.loads(data)
+        print("✓ Loaded calibration config")
+    except Exception:
+        print("⚠️  No config found, run test_02 first")
+        return {}
+    
+    _CONFIG_CACHE[filename] = (mtime, config)
+    return copy.deepcopy(config)
+
+
+def save_adb_config(config, filename=CONFIG_FILE):
+    """Write config to disk and keep the cache in sync"""
+    if orjson is not None:
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
+    else:
+        with open(filename, 'w') as f:
+            json.dump(config, f, indent=2)
+    
+    _CONFIG_CACHE[filename] = (os.path.getmtime(filename), copy.deepcopy(config))
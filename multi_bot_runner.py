@@ -9,6 +9,7 @@ import subprocess
 import sys
 import time
 import os
+import concurrent.futures
 
 # MuMu 12 port configuration
 MUMU12_BASE_PORT = 16384
@@ -38,35 +39,52 @@ def verify_device_responsive(device_id):
         return False
 
 
+def try_connect_instance(address):
+    """
+    Connect to one emulator address and check it responds
+    Returns the address if usable, else None
+    """
+    # Try to connect
+    result = run_adb(["connect", address])
+    output = result.stdout.lower()
+    
+    if "connected" in output and "cannot" not in output and "refused" not in output:
+        if verify_device_responsive(address):
+            print(f"  ✓ Connected & verified: {address}")
+            return address
+    elif "already connected" in output:
+        if verify_device_responsive(address):
+            print(f"  ✓ Already connected: {address}")
+            return address
+    
+    return None
+
+
 def auto_connect_mumu_instances():
     """
     Auto-discover and connect to all MuMu 12 instances
-    Returns list of verified, responsive device IDs
+    All ports are probed at once - each dead port costs a connect attempt
+    + up to 3s verify timeout, which used to add up one after another
+    
+    Returns list of verified, responsive device IDs (in port order)
     """
     print("=" * 60)
     print("AUTO-CONNECTING TO MUMU 12 INSTANCES")
     print("=" * 60)
     
-    connected = []
+    addresses = [
+        f"127.0.0.1:{MUMU12_BASE_PORT + (i * MUMU12_PORT_INCREMENT)}"
+        for i in range(MUMU12_MAX_INSTANCES)
+    ]
     
-    for i in range(MUMU12_MAX_INSTANCES):
-        port = MUMU12_BASE_PORT + (i * MUMU12_PORT_INCREMENT)
-        address = f"127.0.0.1:{port}"
-        
-        # Try to connect
-        result = run_adb(["connect", address])
-        output = result.stdout.lower()
-        
-        if "connected" in output and "cannot" not in output and "refused" not in output:
-            if verify_device_responsive(address):
-                print(f"  ✓ Connected & verified: {address}")
-                connected.append(address)
-        elif "already connected" in output:
-            if verify_device_responsive(address):
-                print(f"  ✓ Already connected: {address}")
-                connected.append(address)
-        
-        time.sleep(0.2)
+    # Start the adb server once up front - otherwise every parallel connect
+    # races to start it and some fail with connect/protocol errors
+    run_adb(["start-server"])
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MUMU12_MAX_INSTANCES) as pool:
+        results = list(pool.map(try_connect_instance, addresses))
+    
+    connected = [address for address in results if address]
     
     print(f"\n✓ Found {len(connected)} active emulator(s)")
     return connected
@@ -4,10 +4,81 @@ TEST 02: ADB Calibration (VISUAL METHOD - RIGHT CLICK)
 Complete workflow with clear navigation steps
 """
 
-import json
+import collections
+import time
 import cv2
 import numpy as np
 from adb_controller import ADBController
+from config_loader import save_adb_config
+
+
+# Point-picking steps that share the same flow: banner, setup, click + test.
+# Each point is (config key, window label, what to right click on).
+CALIBRATION_STEPS = {
+    "battle_ui": {
+        "title": "STEP 1: Battle UI (AUTO + BATTLE buttons)",
+        "setup": [
+            "1. Start any battle in the emulator",
+            "2. Make sure AUTO and BATTLE buttons are visible",
+        ],
+        "ready": "Press ENTER when you're on a battle screen...",
+        "points": [
+            ("auto_button", "AUTO button", "AUTO button"),
+            ("battle_button", "BATTLE button", "BATTLE button"),
+        ],
+        "done": "Battle UI calibrated",
+    },
+    "main_menu": {
+        "title": "STEP 2: Main Menu Navigation",
+        "setup": [
+            "1. Press BACK button to return to main menu",
+            "2. You should see the main tabs at the bottom",
+        ],
+        "ready": "Press ENTER when you're at the main menu...",
+        "points": [
+            ("battles_tab", "BATTLES Tab", "BATTLES tab (bottom navigation)"),
+        ],
+        "done": "Battles tab calibrated",
+    },
+    "solo_battles": {
+        "title": "STEP 3: Solo Battles Screen",
+        "setup": [
+            "1. Click the BATTLES tab if you haven't already",
+            "2. You should see SOLO BATTLE button",
+        ],
+        "ready": "Press ENTER when ready...",
+        "points": [
+            ("solo_battle_button", "SOLO BATTLE", "SOLO BATTLE button"),
+        ],
+        "tap_after": "Clicking SOLO BATTLE...",
+        "done": "Solo Battle calibrated",
+    },
+    "expansions_menu": {
+        "title": "STEP 5: Expansions Menu",
+        "setup": [
+            "1. Press BACK to return to main menu",
+            "2. Find the EXPANSIONS tab/button",
+        ],
+        "ready": "Press ENTER when ready...",
+        "points": [
+            ("expansions_button", "EXPANSIONS Tab", "EXPANSIONS tab/button"),
+        ],
+        "tap_after": "Opening expansions menu...",
+        "done": "Expansions button calibrated",
+    },
+    "series_buttons": {
+        "title": "STEP 6: Series Buttons (A/B)",
+        "note": "You should see the expansions menu with A and B series buttons",
+        "ready": "Press ENTER when ready...",
+        # B series first, then A
+        "points": [
+            ("B", "B SERIES", "B-SERIES button"),
+            ("A", "A SERIES", "A-SERIES button"),
+        ],
+        "group": "series_buttons",
+        "done": "Series buttons calibrated",
+    },
+}
 
 
 class VisualCalibrator:
@@ -17,6 +88,9 @@ class VisualCalibrator:
         self.current_screenshot = None
         self.clicked_point = None
         
+        # Last few clicks for the element being calibrated (convergence check)
+        self._recent = collections.deque(maxlen=3)
+        
         # Get screen dimensions
         self.width, self.height = self.controller.get_screen_size()
         print(f"✓ Emulator screen: {self.width}x{self.height}")
@@ -81,7 +155,6 @@ class VisualCalibrator:
         """Test a coordinate by tapping it in the emulator"""
         print(f"\n  Testing coordinate ({x}, {y}) in emulator...")
         print("  Watch your emulator!")
-        import time
         time.sleep(1)
         self.controller.tap(x, y)
         
@@ -90,6 +163,8 @@ class VisualCalibrator:
     
     def calibrate_with_test(self, window_name, prompt):
         """Get point and verify by testing"""
+        self._recent.clear()
+        
         while True:
             point = self.get_point_from_click(window_name, prompt)
             
@@ -98,6 +173,19 @@ class VisualCalibrator:
             
             x, y = point
             
+            # Last 3 retries landed within ±5px - user has converged, accept
+            # the average of those clicks (evens out jitter) without another test tap
+            if len(self._recent) == self._recent.maxlen and all(
+                abs(px - x) <= 5 and abs(py - y) <= 5 for px, py in self._recent
+            ):
+                clicks = list(self._recent) + [(x, y)]
+                x = round(sum(px for px, _ in clicks) / len(clicks))
+                y = round(sum(py for _, py in clicks) / len(clicks))
+                print(f"  ✓ Clicks converged on ({x}, {y}) - auto-accepting")
+                return (x, y)
+            
+            self._recent.append((x, y))
+            
             # Test the coordinate
             if self.test_coordinate(x, y):
                 return point
@@ -105,88 +193,46 @@ class VisualCalibrator:
                 print("  Let's try again...")
                 continue
     
-    # ===== STEP 1: BATTLE UI =====
-    def calibrate_battle_ui(self):
-        """Calibrate AUTO and BATTLE buttons"""
-        print("\n" + "="*60)
-        print("STEP 1: Battle UI (AUTO + BATTLE buttons)")
-        print("="*60)
-        print("\n⚠️  SETUP:")
-        print("  1. Start any battle in the emulator")
-        print("  2. Make sure AUTO and BATTLE buttons are visible")
-        
-        input("\n✓ Press ENTER when you're on a battle screen...")
-        
-        # AUTO button
-        auto_pos = self.calibrate_with_test(
-            "Calibration - AUTO button",
-            "📍 RIGHT CLICK on the AUTO button"
-        )
-        if auto_pos:
-            self.config["auto_button"] = list(auto_pos)
-        
-        # BATTLE button
-        battle_pos = self.calibrate_with_test(
-            "Calibration - BATTLE button",
-            "📍 RIGHT CLICK on the BATTLE button"
-        )
-        if battle_pos:
-            self.config["battle_button"] = list(battle_pos)
-        
-        cv2.destroyAllWindows()
-        print("✓ Battle UI calibrated")
-    
-    # ===== STEP 2: MAIN MENU NAVIGATION =====
-    def calibrate_main_menu(self):
-        """Calibrate main menu navigation"""
+    # ===== SIMPLE POINT STEPS (1, 2, 3, 5, 6) =====
+    def _run_step(self, spec):
+        """Run one table-driven calibration step from CALIBRATION_STEPS"""
         print("\n" + "="*60)
-        print("STEP 2: Main Menu Navigation")
+        print(spec["title"])
         print("="*60)
-        print("\n⚠️  SETUP:")
-        print("  1. Press BACK button to return to main menu")
-        print("  2. You should see the main tabs at the bottom")
+        if spec.get("setup"):
+            print("\n⚠️  SETUP:")
+            for line in spec["setup"]:
+                print(f"  {line}")
+        if spec.get("note"):
+            print(f"\n⚠️  {spec['note']}")
         
-        input("\n✓ Press ENTER when you're at the main menu...")
+        input(f"\n✓ {spec['ready']}")
         
-        # BATTLES tab
-        battles_tab = self.calibrate_with_test(
-            "Calibration - BATTLES Tab",
-            "📍 RIGHT CLICK on the BATTLES tab (bottom navigation)"
-        )
-        if battles_tab:
-            self.config["battles_tab"] = list(battles_tab)
+        group = spec.get("group")
+        captured = {}
         
-        cv2.destroyAllWindows()
-        print("✓ Battles tab calibrated")
-    
-    # ===== STEP 3: SOLO BATTLES =====
-    def calibrate_solo_battles(self):
-        """Calibrate Solo Battles button"""
-        print("\n" + "="*60)
-        print("STEP 3: Solo Battles Screen")
-        print("="*60)
-        print("\n⚠️  SETUP:")
-        print("  1. Click the BATTLES tab if you haven't already")
-        print("  2. You should see SOLO BATTLE button")
-        
-        input("\n✓ Press ENTER when ready...")
-        
-        # SOLO BATTLE button
-        solo_battle = self.calibrate_with_test(
-            "Calibration - SOLO BATTLE",
-            "📍 RIGHT CLICK on the SOLO BATTLE button"
-        )
-        if solo_battle:
-            self.config["solo_battle_button"] = list(solo_battle)
-            
-            # Click it to navigate
-            print("\n  Clicking SOLO BATTLE...")
-            self.controller.tap(*solo_battle)
-            import time
+        for key, label, target in spec["points"]:
+            pos = self.calibrate_with_test(
+                f"Calibration - {label}",
+                f"📍 RIGHT CLICK on the {target}"
+            )
+            if pos:
+                captured[key] = list(pos)
+        
+        if group:
+            if captured:
+                self.config[group] = captured
+        else:
+            self.config.update(captured)
+        
+        # Some steps tap the calibrated button to move on to the next screen
+        if spec.get("tap_after") and captured:
+            print(f"\n  {spec['tap_after']}")
+            self.controller.tap(*next(iter(captured.values())))
             time.sleep(2)
         
         cv2.destroyAllWindows()
-        print("✓ Solo Battle calibrated")
+        print(f"✓ {spec['done']}")
     
     # ===== STEP 4: DIFFICULTY BUTTONS =====
     def calibrate_difficulty_buttons(self):
@@ -222,11 +268,9 @@ class VisualCalibrator:
             
             # Test scroll twice
             print("\n  Testing scroll gesture (2 times)...")
-            self.controller.swipe(*scroll_start, *scroll_end)
-            import time
-            time.sleep(1)
-            self.controller.swipe(*scroll_start, *scroll_end)
-            time.sleep(1)
+            # Same slow hold-swipe switch_to_difficulty replays (400ms + 1000ms hold)
+            for _ in range(2):
+                self.controller.swipe_with_hold(*scroll_start, *scroll_end, duration=400, hold_time=1000, delay=1)
             
             input("  Did the screen scroll to reveal difficulties? Press ENTER...")
         
@@ -248,69 +292,6 @@ class VisualCalibrator:
         cv2.destroyAllWindows()
         print("✓ Difficulties calibrated")
     
-    # ===== STEP 5: EXPANSIONS MENU =====
-    def calibrate_expansions_menu(self):
-        """Calibrate expansions menu"""
-        print("\n" + "="*60)
-        print("STEP 5: Expansions Menu")
-        print("="*60)
-        print("\n⚠️  SETUP:")
-        print("  1. Press BACK to return to main menu")
-        print("  2. Find the EXPANSIONS tab/button")
-        
-        input("\n✓ Press ENTER when ready...")
-        
-        # EXPANSIONS button/tab
-        exp_button = self.calibrate_with_test(
-            "Calibration - EXPANSIONS Tab",
-            "📍 RIGHT CLICK on the EXPANSIONS tab/button"
-        )
-        if exp_button:
-            self.config["expansions_button"] = list(exp_button)
-            
-            # Click it to open
-            print("\n  Opening expansions menu...")
-            self.controller.tap(*exp_button)
-            import time
-            time.sleep(2)
-        
-        cv2.destroyAllWindows()
-        print("✓ Expansions button calibrated")
-    
-    # ===== STEP 6: SERIES BUTTONS =====
-    def calibrate_series_buttons(self):
-        """Calibrate A/B series buttons"""
-        print("\n" + "="*60)
-        print("STEP 6: Series Buttons (A/B)")
-        print("="*60)
-        print("\n⚠️  You should see the expansions menu with A and B series buttons")
-        
-        input("\n✓ Press ENTER when ready...")
-        
-        series = {}
-        
-        # B series first (as you requested)
-        b_pos = self.calibrate_with_test(
-            "Calibration - B SERIES",
-            "📍 RIGHT CLICK on the B-SERIES button"
-        )
-        if b_pos:
-            series["B"] = list(b_pos)
-        
-        # A series
-        a_pos = self.calibrate_with_test(
-            "Calibration - A SERIES",
-            "📍 RIGHT CLICK on the A-SERIES button"
-        )
-        if a_pos:
-            series["A"] = list(a_pos)
-        
-        if series:
-            self.config["series_buttons"] = series
-        
-        cv2.destroyAllWindows()
-        print("✓ Series buttons calibrated")
-    
     # ===== STEP 7: EXPANSION SCROLL =====
     def calibrate_expansion_scroll(self):
         """Calibrate expansion list scroll gesture"""
@@ -345,7 +326,6 @@ class VisualCalibrator:
             print("\n  Testing expansion scroll gesture...")
             print("  Watch if ONE expansion scrolls into view...")
             self.controller.swipe(*scroll_start, *scroll_end, duration=400)
-            import time
             time.sleep(1)
             
             response = input("  Did it scroll correctly (one expansion revealed)? (y/n): ").lower()
@@ -387,8 +367,7 @@ class VisualCalibrator:
     
     def save_config(self, filename="adb_config.json"):
         """Save configuration"""
-        with open(filename, 'w') as f:
-            json.dump(self.config, f, indent=2)
+        save_adb_config(self.config, filename)
         print(f"\n✓ Configuration saved: {filename}")
     
     def run_full_calibration(self):
@@ -415,12 +394,12 @@ class VisualCalibrator:
         input("\nPress ENTER to begin...")
         
         # Run calibration steps IN ORDER
-        self.calibrate_battle_ui()
-        self.calibrate_main_menu()
-        self.calibrate_solo_battles()
+        self._run_step(CALIBRATION_STEPS["battle_ui"])
+        self._run_step(CALIBRATION_STEPS["main_menu"])
+        self._run_step(CALIBRATION_STEPS["solo_battles"])
         self.calibrate_difficulty_buttons()
-        self.calibrate_expansions_menu()
-        self.calibrate_series_buttons()
+        self._run_step(CALIBRATION_STEPS["expansions_menu"])
+        self._run_step(CALIBRATION_STEPS["series_buttons"])
         self.calibrate_expansion_scroll()
         self.calibrate_expansion_slots()
         
@@ -7,15 +7,46 @@ Tests reward icon detection and battle finding using ADB screenshots
 import cv2
 import numpy as np
 import time
-import json
+import os
+import sys
+import zlib
 from adb_controller import ADBController
+from config_loader import config_path_for, load_adb_config, save_adb_config
 
 
 class BattleFinderADB:
-    def __init__(self, device_id=None):
+    # Reward icon color ranges (HSV) - built once at import, shared by all instances
+    _COLOR_RANGES = tuple(
+        (np.array(lower, dtype=np.uint8), np.array(upper, dtype=np.uint8))
+        for lower, upper in [
+            # Cyan/Blue (magnifying glass, hourglass) + Purple/Magenta (hourglass)
+            # Same S/V bounds and touching hues, so one pass covers both
+            ([80, 100, 150], [170, 255, 255]),
+            
+            # Yellow/Gold
+            ([15, 100, 150], [45, 255, 255]),
+            
+            # Any bright saturated color (catch-all)
+            # Hue span covers all of OpenCV's 0-179, so this is just S>=120 & V>=180;
+            # inRange still beats separate numpy channel compares + AND on strided planes
+            ([0, 120, 180], [180, 255, 255])
+        ]
+    )
+    
+    def __init__(self, device_id=None, use_scrcpy=False, interactive=None):
         self.controller = ADBController(device_id)
         self.battle_list_region = None
         
+        # Interactive = someone is watching (confirmation taps, OpenCV windows)
+        # Defaults to whether stdin is a terminal, so scheduled/piped runs skip them
+        self.interactive = sys.stdin.isatty() if interactive is None else interactive
+        self._cached_screen_size = None
+        self._bgr_buf = None
+        self._strip_buf = None
+        
+        # Optional scrcpy video stream - screenshots become a copy of the latest frame
+        self._scrcpy = self.controller.start_frame_stream() if use_scrcpy else None
+        
         # Load config
         self.config = self.load_config()
         
@@ -26,21 +57,118 @@ class BattleFinderADB:
         else:
             self.reward_detection_region = None
             print("⚠️ No reward detection region configured")
+        
+        # Reward detection runs at 1/scale resolution - detections are scaled back up
+        # Icon size limits are in full-res pixels, blob areas shrink by scale^2
+        self.scale = 2
+        self._min_icon_area = 150 / self.scale ** 2
+        self._max_icon_area = 3000 / self.scale ** 2
+        
+        # Reusable per-frame buffers for find_reward_icons (sized to downscaled reward region)
+        # Allocated on first scan, so a region set after __init__ works too
+        self._small = None
+        self._hsv = None
+        self._mask = None
+        self._combined = None
+        
+        # Last scanned reward region (hash + result) - skip CV on identical frames
+        self._last_region_hash = None
+        self._last_detections = []
+    
+    def _allocate_buffers(self, h, w):
+        """(Re)allocate the resize + HSV + mask buffers used by find_reward_icons"""
+        self._small = np.empty((h, w, 3), dtype=np.uint8)
+        self._hsv = np.empty((h, w, 3), dtype=np.uint8)
+        self._mask = np.empty((h, w), dtype=np.uint8)
+        self._combined = np.empty((h, w), dtype=np.uint8)
+        self._bright = np.empty((h, w * 3), dtype=np.uint8)
     
     def load_config(self):
-        """Load calibrated coordinates"""
-        try:
-            with open('adb_config.json', 'r') as f:
-                config = json.load(f)
-                print("✓ Loaded calibration config")
-                return config
-        except:
-            print("⚠️  No config found, run test_02 first")
-            return {}
+        """Load calibrated coordinates (shared cache, only re-parsed when the file changes)"""
+        return load_adb_config(config_path_for(self.controller.device))
+    
+    def save_config(self):
+        """Write config back to the file it was loaded from"""
+        save_adb_config(self.config, config_path_for(self.controller.device))
+    
+    @property
+    def screen_size(self):
+        """Emulator (width, height) - asked from ADB once, then cached"""
+        if self._cached_screen_size is None:
+            self._cached_screen_size = self.controller.get_screen_size()
+        return self._cached_screen_size
+    
+    @property
+    def battle_list_region(self):
+        """Battle list area (x, y, w, h) or None for full screen"""
+        return self._battle_list_region
+    
+    @battle_list_region.setter
+    def battle_list_region(self, region):
+        """Store region + precompute the scroll points inside it (shared with ExpansionSearcherADB)"""
+        self._battle_list_region = region
+        
+        if region:
+            x, y, w, h = region
+            self.scroll_x = x + w // 2
+            self.scroll_top_y = y + int(h * 0.2)
+            self.scroll_mid_y = y + int(h * 0.5)
+            self.scroll_bot_y = y + int(h * 0.8)
+        else:
+            self.scroll_x = self.scroll_top_y = self.scroll_mid_y = self.scroll_bot_y = None
+    
+    def _drag_anchor(self):
+        """Where hold-drags start: battle list center, or screen center if no region"""
+        if self.scroll_x is None:
+            width, height = self.screen_size
+            return width // 2, height // 2
+        return self.scroll_x, self.scroll_mid_y
+    
+    def close(self):
+        """Stop the scrcpy stream and persistent adb shell"""
+        self._scrcpy = None
+        self.controller.close()
+    
+    def _scrcpy_frame(self):
+        """Latest scrcpy frame (BGR), or None if streaming is off / no frame yet"""
+        if self._scrcpy is None:
+            return None
+        return self._scrcpy.last_frame
     
     def take_screenshot(self):
         """Take screenshot via ADB and return OpenCV format"""
-        return self.controller.screenshot_cv()
+        frame = self._scrcpy_frame()
+        if frame is not None:
+            return frame.copy()
+        return self.take_screenshot_fast()
+    
+    def take_screenshot_fast(self):
+        """
+        Take screenshot from the raw framebuffer instead of a PNG
+        Skips PNG compression on device and zlib decode here - the slowest
+        part of every scan (the CV work itself is a few ms)
+        
+        The BGR image is written into one reused buffer, so it is only
+        valid until the next screenshot (falls back to PNG like screenshot_cv)
+        """
+        self._bgr_buf = self.controller.screenshot_cv(dst=self._bgr_buf)
+        return self._bgr_buf
+    
+    def take_reward_strip(self):
+        """
+        Take screenshot of the reward detection region only
+        Slices the raw RGBA framebuffer before color conversion, so only the
+        strip is converted (into its own reused buffer, valid until the next call)
+        Falls back to PNG screenshots like screenshot_cv
+        """
+        x, y, w, h = self.reward_detection_region
+        
+        frame = self._scrcpy_frame()
+        if frame is not None:
+            return frame[y:y+h, x:x+w].copy()
+        
+        self._strip_buf = self.controller.screenshot_cv(region=(x, y, w, h), dst=self._strip_buf)
+        return self._strip_buf
     
     def calibrate_battle_list_region(self):
         """
@@ -53,10 +181,19 @@ class BattleFinderADB:
         print("\nFor emulator, we can use the full screen.")
         print("Or you can define a specific region to search.")
         
-        use_full = input("\nUse full emulator screen? (y/n): ").lower()
+        # No one to answer / no window to click in - keep the saved region or use full screen
+        headless = sys.platform.startswith("linux") and not os.environ.get("DISPLAY")
+        if not self.interactive or headless:
+            if 'battle_list_region' in self.config:
+                self.battle_list_region = tuple(self.config['battle_list_region'])
+                print(f"✓ Non-interactive: using saved region {self.battle_list_region}")
+                return True
+            use_full = 'y'
+        else:
+            use_full = input("\nUse full emulator screen? (y/n): ").lower()
         
         if use_full == 'y':
-            width, height = self.controller.get_screen_size()
+            width, height = self.screen_size
             self.battle_list_region = (0, 0, width, height)
             print(f"✓ Using full screen: {self.battle_list_region}")
         else:
@@ -97,10 +234,11 @@ class BattleFinderADB:
             self.battle_list_region = (x1, y1, x2 - x1, y2 - y1)
             print(f"✓ Battle list region: {self.battle_list_region}")
         
-        # Save to config
-        self.config['battle_list_region'] = list(self.battle_list_region)
-        with open('adb_config.json', 'w') as f:
-            json.dump(self.config, f, indent=2)
+        # Save to config (only if it changed - keeps the file + config cache untouched)
+        region = list(self.battle_list_region)
+        if self.config.get('battle_list_region') != region:
+            self.config['battle_list_region'] = region
+            self.save_config()
         
         return True
     
@@ -118,56 +256,109 @@ class BattleFinderADB:
         # Crop to reward region only
         cropped = screen_cv[y:y+h, x:x+w]
         
-        # Convert to HSV
-        hsv = cv2.cvtColor(cropped, cv2.COLOR_BGR2HSV)
+        return self._detect_icons(cropped, x, y)
+    
+    def _detect_icons(self, cropped, x, y):
+        """
+        Run the reward icon pipeline on an already cropped BGR image
+        x, y: full screen position of the crop's top-left corner
+        Returns list of (x, y, area) tuples in FULL SCREEN coordinates
+        """
+        # Half resolution is plenty - smallest accepted icon is still ~37px
+        # and every stage below touches scale^2 fewer pixels
+        scale = self.scale
+        small_h, small_w = cropped.shape[0] // scale, cropped.shape[1] // scale
+        
+        # First scan, or region clipped by a smaller screen - (re)size buffers to match
+        if self._mask is None or (small_h, small_w) != self._mask.shape:
+            self._allocate_buffers(small_h, small_w)
+        
+        small = cv2.resize(cropped, (small_w, small_h), dst=self._small, interpolation=cv2.INTER_AREA)
+        
+        # Same pixels as the last scan (e.g. verification re-scan of a static screen)
+        # Detection is deterministic, so reuse the previous result
+        region_hash = zlib.crc32(small)
+        if region_hash == self._last_region_hash:
+            return list(self._last_detections)
+        
+        self._last_region_hash = region_hash
+        
+        # Every color range needs V >= 150, and V is the max BGR channel - if no more
+        # channel values than the smallest blob reach 150, skip HSV entirely
+        cv2.threshold(small.reshape(small_h, small_w * 3), 149, 255, cv2.THRESH_BINARY, dst=self._bright)
+        if cv2.countNonZero(self._bright) <= self._min_icon_area:
+            self._last_detections = []
+            return []
         
-        # Simplified, more lenient color ranges
-        color_ranges = [
-            # Cyan/Blue (magnifying glass, hourglass)
-            ([80, 100, 150], [130, 255, 255]),
-            
-            # Purple/Magenta (hourglass)
-            ([130, 100, 150], [170, 255, 255]),
-            
-            # Yellow/Gold
-            ([15, 100, 150], [45, 255, 255]),
-            
-            # Any bright saturated color (catch-all)
-            ([0, 120, 180], [180, 255, 255])
-        ]
+        # Convert to HSV (into reused buffer)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV, dst=self._hsv)
+        
+        # Combine all color masks in place - first range writes the mask
+        # directly (no zero-fill + OR), the rest are OR'ed on top
+        (first_lower, first_upper), *other_ranges = self._COLOR_RANGES
+        combined_mask = cv2.inRange(hsv, first_lower, first_upper, dst=self._combined)
         
-        # Combine all color masks
-        combined_mask = np.zeros(hsv.shape[:2], dtype=np.uint8)
+        for lower_np, upper_np in other_ranges:
+            mask = cv2.inRange(hsv, lower_np, upper_np, dst=self._mask)
+            cv2.bitwise_or(combined_mask, mask, dst=combined_mask)
         
-        for lower, upper in color_ranges:
-            lower_np = np.array(lower)
-            upper_np = np.array(upper)
-            mask = cv2.inRange(hsv, lower_np, upper_np)
-            combined_mask = cv2.bitwise_or(combined_mask, mask)
+        # Fewer lit pixels than the smallest accepted blob - nothing can pass
+        if cv2.countNonZero(combined_mask) <= self._min_icon_area:
+            self._last_detections = []
+            return []
         
-        # Find contours
-        contours, _ = cv2.findContours(combined_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        # Only label the box around the lit pixels (usually a small strip)
+        roi_x, roi_y, roi_w, roi_h = cv2.boundingRect(combined_mask)
+        roi = combined_mask[roi_y:roi_y+roi_h, roi_x:roi_x+roi_w]
         
-        detections = []
+        # Label blobs - area + bounding box of every blob in one C call
+        _, _, stats, _ = cv2.connectedComponentsWithStats(roi, connectivity=8)
+        stats = stats[1:]  # Drop background label
+        stats[:, cv2.CC_STAT_LEFT] += roi_x
+        stats[:, cv2.CC_STAT_TOP] += roi_y
         
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            
-            # More lenient size filter
-            if 150 < area < 3000:
-                bx, by, bw, bh = cv2.boundingRect(contour)
-                
-                # Convert to FULL SCREEN coordinates
-                center_x = x + bx + bw // 2
-                center_y = y + by + bh // 2
-                
-                # Aspect ratio check (still useful)
-                aspect_ratio = bw / bh if bh > 0 else 0
-                if 0.5 < aspect_ratio < 2.5:
-                    detections.append((center_x, center_y, area))
+        areas = stats[:, cv2.CC_STAT_AREA]
+        bw = stats[:, cv2.CC_STAT_WIDTH]
+        bh = stats[:, cv2.CC_STAT_HEIGHT]
+        aspect_ratio = bw / bh
+        
+        # More lenient size filter (150-3000px at full res)
+        # + aspect ratio check (still useful, scale-invariant), vectorized
+        keep = ((areas > self._min_icon_area) & (areas < self._max_icon_area) &
+                (aspect_ratio > 0.5) & (aspect_ratio < 2.5))
+        
+        # Convert to FULL SCREEN coordinates (bounding box centers + areas, scaled back up)
+        center_x = x + stats[keep, cv2.CC_STAT_LEFT] * scale + bw[keep] * scale // 2
+        center_y = y + stats[keep, cv2.CC_STAT_TOP] * scale + bh[keep] * scale // 2
+        full_areas = areas[keep] * scale ** 2
+        
+        detections = list(zip(center_x.tolist(), center_y.tolist(), full_areas.tolist()))
+        
+        self._last_detections = detections
         
         return detections
     
+    def _wait_for_settle(self, timeout=1.0, poll=0.1):
+        """
+        Poll screenshots until two in a row are identical (or timeout)
+        Only the reward strip is captured when a region is calibrated
+        Returns the last capture so the caller can scan it directly
+        """
+        capture = self.take_reward_strip if self.reward_detection_region else self.take_screenshot
+        deadline = time.time() + timeout
+        screen = capture()
+        last_hash = zlib.crc32(screen)
+        
+        while time.time() < deadline:
+            time.sleep(poll)
+            screen = capture()
+            screen_hash = zlib.crc32(screen)
+            if screen_hash == last_hash:
+                break
+            last_hash = screen_hash
+        
+        return screen
+    
     def verify_detection(self, click_pos, max_attempts=2):
         """
         Double-check detection by waiting and re-scanning
@@ -176,10 +367,14 @@ class BattleFinderADB:
         print("  🔍 Verifying detection...")
         
         for attempt in range(max_attempts):
-            time.sleep(1.0)  # Wait for screen to settle
+            # Wait for screen to settle (returns as soon as two frames match)
+            settled = self._wait_for_settle(timeout=1.0)
             
-            # Take fresh screenshot
-            recheck_pos = self.find_battle_with_rewards()
+            # Re-scan the settled frame
+            if self.reward_detection_region:
+                recheck_pos = self.find_battle_with_rewards(strip=settled)
+            else:
+                recheck_pos = self.find_battle_with_rewards(settled)
             
             if not recheck_pos:
                 print(f"  ✗ Verification {attempt+1}/{max_attempts}: Not detected")
@@ -215,26 +410,14 @@ class BattleFinderADB:
             return []
         
         # Sort by Y coordinate
-        icons = sorted(icons, key=lambda p: p[1])
+        arr = np.asarray(icons)
+        arr = arr[np.argsort(arr[:, 1], kind="stable")]
         
-        clusters = []
-        current_cluster = [icons[0]]
+        # Icons within 80px = same battle - split wherever the Y gap is bigger
+        splits = np.flatnonzero(np.diff(arr[:, 1]) >= 80) + 1
+        groups = np.split(arr, splits)
         
-        for i in range(1, len(icons)):
-            y_diff = abs(icons[i][1] - current_cluster[-1][1])
-            
-            # Icons within 80px = same battle
-            if y_diff < 80:
-                current_cluster.append(icons[i])
-            else:
-                if len(current_cluster) >= 2:
-                    clusters.append(current_cluster)
-                current_cluster = [icons[i]]
-        
-        if len(current_cluster) >= 2:
-            clusters.append(current_cluster)
-        
-        return clusters
+        return [g.tolist() for g in groups if len(g) >= 2]
     
     def get_battle_click_position(self, cluster):
         """
@@ -252,18 +435,27 @@ class BattleFinderADB:
         
         return (click_x, click_y)
     
-    def find_battle_with_rewards(self):
+    def find_battle_with_rewards(self, screen_cv=None, strip=None):
         """
         Main function: Find a battle with rewards on current screen
+        screen_cv: optional already-captured full screenshot
+        strip: optional already-captured reward strip (from take_reward_strip)
         Returns (click_x, click_y) or None
         """
         print("\n--- Scanning for battles with rewards ---")
         
-        # Take screenshot via ADB
-        screen_cv = self.take_screenshot()
+        # Nothing handed in - only the reward strip is needed
+        if screen_cv is None and strip is None and self.reward_detection_region:
+            strip = self.take_reward_strip()
         
         # Find reward icons
-        all_icons = self.find_reward_icons(screen_cv)
+        if strip is not None:
+            x, y, _, _ = self.reward_detection_region
+            all_icons = self._detect_icons(strip, x, y)
+        else:
+            if screen_cv is None:
+                screen_cv = self.take_screenshot()
+            all_icons = self.find_reward_icons(screen_cv)
         print(f"  Found {len(all_icons)} reward icon(s) on screen")
         
         # Filter to battle list region
@@ -292,8 +484,8 @@ class BattleFinderADB:
         return click_pos
     
     def show_detection_visually(self, click_pos):
-        """Tap in emulator to show detection"""
-        if not click_pos:
+        """Tap in emulator to show detection (skipped when nobody is watching)"""
+        if not click_pos or not self.interactive:
             return
         
         print("\n--- Visual Confirmation ---")
@@ -310,14 +502,7 @@ class BattleFinderADB:
     
     def drag_scroll_down(self, distance=200):
         """Scroll down in battle list with hold"""
-        if not self.battle_list_region:
-            width, height = self.controller.get_screen_size()
-            scroll_x = width // 2
-            scroll_y = height // 2
-        else:
-            x, y, w, h = self.battle_list_region
-            scroll_x = x + w // 2
-            scroll_y = y + int(h * 0.5)
+        scroll_x, scroll_y = self._drag_anchor()
         
         print(f"  Scrolling down at ({scroll_x}, {scroll_y})...")
         # Use swipe_with_hold to prevent flick
@@ -329,14 +514,7 @@ class BattleFinderADB:
 
     def drag_scroll_up(self, distance=200):
         """Scroll up in battle list with hold"""
-        if not self.battle_list_region:
-            width, height = self.controller.get_screen_size()
-            scroll_x = width // 2
-            scroll_y = height // 2
-        else:
-            x, y, w, h = self.battle_list_region
-            scroll_x = x + w // 2
-            scroll_y = y + int(h * 0.5)
+        scroll_x, scroll_y = self._drag_anchor()
         
         print(f"  Scrolling up at ({scroll_x}, {scroll_y})...")
         # Use swipe_with_hold to prevent flick
@@ -5,9 +5,7 @@ Searches through expansion packs when no rewards on main screen
 FIXED: Added longer delay after opening expansion to prevent misclicks
 """
 
-import json
 import time
-from adb_controller import ADBController
 from test_03_adb_find_battles import BattleFinderADB
 
 # Max down-scrolls inside a single expansion
@@ -16,22 +14,14 @@ MAX_DOWN_SCANS_PER_EXPANSION = 9
 
 class ExpansionSearcherADB:
     def __init__(self, device_id=None):
-        self.controller = ADBController(device_id)
         self.finder = BattleFinderADB(device_id)
-        self.config = self.load_config()
+        self.controller = self.finder.controller  # Same device - reuse the finder's connection
+        self.config = self.finder.config  # Same adb_config.json - already loaded by the finder
         self.checked_expansions = set()
         self.max_expansions = 12
-    
-    def load_config(self):
-        """Load calibrated coordinates"""
-        try:
-            with open('adb_config.json', 'r') as f:
-                config = json.load(f)
-                print("✓ Loaded calibration config")
-                return config
-        except:
-            print("⚠️  No config found, run test_02 first")
-            return {}
+        
+        # Calibrated expansion-menu scroll (start, end) - read from config on first use
+        self._expansion_scroll = None
     
     # ==================== BASIC ACTIONS ====================
     
@@ -44,14 +34,21 @@ class ExpansionSearcherADB:
     
     def perform_scroll_gesture(self, times=1):
         """Perform calibrated scroll gesture in expansion list with hold"""
-        scroll_config = self.config.get("expansion_scroll", {})
-        start = tuple(scroll_config.get("start", (0, 0)))
-        end = tuple(scroll_config.get("end", (0, 0)))
-        
-        for i in range(times):
-            print(f"  ↕ Expansion scroll gesture {i+1}/{times}")
-            self.controller.swipe_with_hold(*start, *end, duration=400, hold_time=500, delay=1.2)
-            time.sleep(0.5)
+        if self._expansion_scroll is None:
+            scroll_config = self.config.get("expansion_scroll", {})
+            self._expansion_scroll = (
+                tuple(scroll_config.get("start", (0, 0))),
+                tuple(scroll_config.get("end", (0, 0)))
+            )
+        start, end = self._expansion_scroll
+        if times <= 0:
+            return
+        
+        # All gestures as ONE device-side script - slow 900ms swipe (no fling)
+        # then 1.7s settle each, same pacing as separate swipe_with_hold calls
+        print(f"  ↕ Expansion scroll gesture x{times}")
+        gesture = f"input swipe {start[0]} {start[1]} {end[0]} {end[1]} 900; sleep 1.7"
+        self.controller.shell_batch("; ".join([gesture] * times), delay=0)
     
     def open_visible_expansion(self, visible_index):
         """Click the nth visible expansion slot"""
@@ -109,36 +106,30 @@ class ExpansionSearcherADB:
         """
         print("  Scanning expansion for rewards...")
         
-        # Get battle list scroll region from config
-        battle_list_region = self.config.get("battle_list_region", None)
-        if not battle_list_region:
-            print("  ⚠️ Battle list region not calibrated!")
-            return None
-        
-        x, y, w, h = battle_list_region
+        # Battle list region from config (the finder precomputes its scroll points)
+        if not self.finder.battle_list_region:
+            battle_list_region = self.config.get("battle_list_region", None)
+            if not battle_list_region:
+                print("  ⚠️ Battle list region not calibrated!")
+                return None
+            self.finder.battle_list_region = tuple(battle_list_region)
         
-        # Calculate scroll coordinates INSIDE the battle list
-        start_x = x + w // 2
-        start_y = y + int(h * 0.8)
-        end_x = start_x
-        end_y = y + int(h * 0.2)
+        # Scroll coordinates INSIDE the battle list (bottom 80% -> top 20%)
+        start_x = end_x = self.finder.scroll_x
+        start_y = self.finder.scroll_bot_y
+        end_y = self.finder.scroll_top_y
         
         # FIXED: Wait a moment before scrolling to ensure screen is ready
         print("  Waiting for expansion to load...")
         time.sleep(1)
         
         # OPTIMIZATION: 3 fast scrolls to bottom (no hold, pure speed)
+        # One device-side script for all 3 swipes (0.8s between, as before)
         print("  Fast scrolling to bottom (where rewards are)...")
-        for i in range(3):
-            print(f"    Quick scroll {i+1}/3", end="\r")
-            self.controller.swipe(
-                start_x, start_y,
-                end_x, end_y,
-                duration=200
-            )
-            time.sleep(0.3)  # Slightly longer delay between scrolls
+        quick_scroll = f"input swipe {start_x} {start_y} {end_x} {end_y} 200; sleep 0.8"
+        self.controller.shell_batch("; ".join([quick_scroll] * 3), delay=0)
         
-        print("\n  Waiting for battles to settle...")
+        print("  Waiting for battles to settle...")
         time.sleep(1.0)
         
         # Single check at bottom
@@ -8,10 +8,8 @@ Complete battle bot with:
 - AUTO/BATTLE clicking
 """
 
-import json
 import time
-from adb_controller import ADBController
-from test_03_adb_find_battles import BattleFinderADB
+from config_loader import config_path_for, load_adb_config
 from test_04_adb_expansions import ExpansionSearcherADB
 from progress_tracker import ProgressTracker
 
@@ -26,16 +24,18 @@ EXPANSION_COUNTS = {
 class RewardBattleBotADB:
     # CHANGE THIS LINE:
     def __init__(self, device_id=None): 
-        # Pass device_id to the controller and tracker
-        self.adb = ADBController(device_id) 
-        self.tracker = ProgressTracker(device_id) 
+        # One device connection per bot - searcher, finder and bot share it
         self.device_id = device_id
-        self.controller = ADBController(device_id)
-        self.finder = BattleFinderADB(device_id)
         self.expansion_searcher = ExpansionSearcherADB(device_id)
+        self.finder = self.expansion_searcher.finder
+        self.controller = self.finder.controller
         
         self.config = self.load_config()
-        self.progress = ProgressTracker()
+        self.progress = ProgressTracker(device_id)
+        
+        # Optional [x, y, w, h] compared when waiting for the UI to settle (full screen if unset)
+        # Each wait after a tap: at least half the old fixed sleep, at most all of it
+        self.stability_roi = self.config.get("stability_roi")
         
         # Track current game state
         self.current_series = "A"
@@ -45,24 +45,18 @@ class RewardBattleBotADB:
         self.last_battle_location = None  # (difficulty, series, expansion_num)
     
     def load_config(self):
-        """Load calibrated coordinates"""
-        try:
-            with open('adb_config.json', 'r') as f:
-                config = json.load(f)
-                print("✓ Loaded calibration config")
-                
-                # DEBUG: Show series button coordinates
-                if "series_buttons" in config:
-                    print(f"  Series buttons loaded:")
-                    print(f"    A-series: {config['series_buttons'].get('A')}")
-                    print(f"    B-series: {config['series_buttons'].get('B')}")
-                else:
-                    print("  ⚠️ WARNING: No series_buttons in config!")
-                
-                return config
-        except Exception as e:
-            print(f"⚠️ Error loading config: {e}")
-            return {}
+        """Load calibrated coordinates (shared cache with the finder/searcher)"""
+        config = load_adb_config(config_path_for(self.controller.device))
+        
+        # DEBUG: Show series button coordinates
+        if "series_buttons" in config:
+            print(f"  Series buttons loaded:")
+            print(f"    A-series: {config['series_buttons'].get('A')}")
+            print(f"    B-series: {config['series_buttons'].get('B')}")
+        else:
+            print("  ⚠️ WARNING: No series_buttons in config!")
+        
+        return config
     
     # ==================== NAVIGATION ====================
     
@@ -73,9 +67,10 @@ class RewardBattleBotADB:
         
         print(f"\n--- Switching to {difficulty_name.upper()} difficulty ---")
         
+        # Whole sequence runs as ONE device-side script (same pacing as before)
         # Step 1: Press BACK once to return to Solo Battles screen
         print("  [Step 1/3] Pressing BACK to return to Solo Battles...")
-        self.controller.press_back(delay=2)
+        script = ["input keyevent 4", "sleep 2"]
         
         # Step 2: CONDITIONAL SCROLL - Only scroll if NOT switching to Beginner
         if difficulty_name != "beginner":
@@ -84,16 +79,17 @@ class RewardBattleBotADB:
             start = tuple(scroll_config.get("start", (0, 0)))
             end = tuple(scroll_config.get("end", (0, 0)))
             
-            for i in range(2):
-                print(f"    Scroll {i+1}/2")
-                self.controller.swipe_with_hold(*start, *end, duration=400, hold_time=1000, delay=1)
+            # Slow swipe (400ms + 1000ms hold) so the list doesn't fling
+            for _ in range(2):
+                script += [f"input swipe {start[0]} {start[1]} {end[0]} {end[1]} 1400", "sleep 1"]
         else:
             print("  [Step 2/3] Skipping scroll (Beginner is already visible)")
         
         # Step 3: Click difficulty button
         print(f"  [Step 3/3] Clicking {difficulty_name.upper()} at {coords}...")
-        self.controller.tap(*coords)
-        time.sleep(2)
+        script.append(f"input tap {coords[0]} {coords[1]}")
+        self.controller.shell_batch("; ".join(script))
+        self.controller.wait_until_stable(self.stability_roi, timeout=2.0, min_wait=1.0)
         
         self.current_difficulty = difficulty_name
         print(f"✓ Now on {difficulty_name.upper()} difficulty")
@@ -123,7 +119,7 @@ class RewardBattleBotADB:
         # THEN click the series button
         print(f"    Step 2: Clicking {target_series}-series button at {coords}...")
         self.controller.tap(*coords)
-        time.sleep(1.5)
+        self.controller.wait_until_stable(self.stability_roi, timeout=1.5, min_wait=0.75)
         
         self.current_series = target_series
         print(f"  ✓ Switched to {target_series}-series")
@@ -141,11 +137,11 @@ class RewardBattleBotADB:
         
         print(f"Clicking AUTO at {auto}...")
         self.controller.tap(*auto)
-        time.sleep(1.2)
+        self.controller.wait_until_stable(self.stability_roi, timeout=1.2, min_wait=0.6)
         
         print(f"Clicking BATTLE at {battle}...")
         self.controller.tap(*battle)
-        time.sleep(1.5)
+        self.controller.wait_until_stable(self.stability_roi, timeout=1.5, min_wait=0.75)
     
     def engage_battle(self, battle_pos):
         """Click battle card and start it"""
@@ -156,7 +152,7 @@ class RewardBattleBotADB:
         click_x, click_y = battle_pos
         print(f"\nClicking battle at ({click_x}, {click_y})...")
         self.controller.tap(click_x, click_y)
-        time.sleep(2)
+        self.controller.wait_until_stable(self.stability_roi, timeout=2.0, min_wait=1.0)
         
         self.click_auto_and_battle()
         print("\n✓ Battle started!")
@@ -183,6 +179,9 @@ class RewardBattleBotADB:
         
         print(f"  Starting from expansion #{start_from}")
         
+        # Series button is the same for every expansion - look it up once
+        series_coords = tuple(self.config.get("series_buttons", {}).get(series_name, (0, 0)))
+        
         for expansion_num in range(start_from, expansion_count + 1):
             scrolls = self.expansion_searcher.get_scrolls_for_expansion(expansion_num)
             slot_idx = self.expansion_searcher.get_visible_slot_index(expansion_num)
@@ -195,16 +194,13 @@ class RewardBattleBotADB:
             
             # Step 2: CRITICAL - Click the series button to switch to correct series
             print(f"    [Step 2/3] Clicking {series_name}-series button...")
-            series_buttons = self.config.get("series_buttons", {})
-            series_coords = tuple(series_buttons.get(series_name, (0, 0)))
-            
             if series_coords == (0, 0):
                 print(f"    ✗ ERROR: {series_name}-series button not calibrated!")
                 return None
             
             print(f"    Tapping {series_name}-series at {series_coords}...")
             self.controller.tap(*series_coords)
-            time.sleep(2)  # Wait for series to switch and load
+            self.controller.wait_until_stable(self.stability_roi, timeout=2.0, min_wait=1.0)  # Wait for series to switch and load
             
             # Step 3: Scroll to position if needed
             print(f"    [Step 3/3] Navigating to expansion #{expansion_num}...")
@@ -5,18 +5,26 @@ Simple and reliable: Detect FULL SCREEN white flash (single check)
 FIXED: Press ESCAPE every 5 seconds to help trigger white screen if missed
 """
 
-import cv2
 import numpy as np
 import time
 from adb_controller import ADBController
 
 
 class BattleEndDetectorADB:
-    def __init__(self, device_id=None):
-        self.adb = ADBController(device_id)
+    def __init__(self, device_id=None, use_scrcpy=False):
         self.controller = ADBController(device_id)
+        
+        # Optional scrcpy video stream - white checks read the latest frame
+        # instead of a screencap each, so they can run much more often
+        self._scrcpy = self.controller.start_frame_stream(max_fps=15) if use_scrcpy else None
+        self.poll_interval = 0.1 if self._scrcpy is not None else 0.5
         print("✓ Battle End Detector initialized (full screen white flash detection)")
     
+    def close(self):
+        """Stop the scrcpy stream and persistent adb shell"""
+        self._scrcpy = None
+        self.controller.close()
+    
     def detect_full_screen_white(self, threshold=200, white_percentage=0.90):
         """
         Detect if ENTIRE screen is white
@@ -27,15 +35,22 @@ class BattleEndDetectorADB:
         
         Returns True if full screen white detected
         """
-        # Take FULL screenshot via ADB
-        screenshot = self.controller.screenshot_cv()
+        # Take FULL screenshot via ADB - every 8th pixel is plenty for a 90% test
+        frame = self._scrcpy.last_frame if self._scrcpy is not None else None
+        if frame is not None:
+            screenshot = frame[::8, ::8]
+        else:
+            screenshot = self.controller.screenshot_cv(step=8)
         
-        # Convert to grayscale
-        gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
+        # White = channel average >= threshold (B+G+R >= 3x threshold) - tinted or
+        # translucent white still counts, a saturated yellow/cyan flash (avg 170) doesn't
+        brightness = screenshot[:, :, 0].astype(np.uint16)
+        brightness += screenshot[:, :, 1]
+        brightness += screenshot[:, :, 2]
         
         # Count pixels above threshold (white pixels)
-        white_pixels = np.sum(gray >= threshold)
-        total_pixels = gray.size
+        white_pixels = np.count_nonzero(brightness >= 3 * threshold)
+        total_pixels = brightness.size
         
         white_percent = white_pixels / total_pixels
         
@@ -87,7 +102,7 @@ class BattleEndDetectorADB:
                 if check_count % 20 == 0:
                     print(f"\n[Check #{check_count}] Still monitoring...")
                 
-                time.sleep(0.5)
+                time.sleep(self.poll_interval)
             except KeyboardInterrupt:
                 print("\nStopped by user")
                 return False
@@ -111,7 +126,10 @@ def main():
     input("\nPress ENTER to start monitoring...")
     
     detector = BattleEndDetectorADB()
-    detector.monitor_battle_end(wait_before_start=30)
+    try:
+        detector.monitor_battle_end(wait_before_start=30)
+    finally:
+        detector.close()
 
 
 if __name__ == "__main__":
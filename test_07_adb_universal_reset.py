@@ -6,88 +6,181 @@ WITH GENEROUS DELAYS to ensure everything loads properly
 """
 
 import time
+import argparse
+import cv2
 from adb_controller import ADBController
+from config_loader import config_path_for, load_adb_config
 
 
 class UniversalResetADB:
-    # CHANGE THIS LINE:
+    # Box around the Battles tab compared after a restart, and the mean pixel
+    # difference still counted as the same tab
+    TAB_PATCH_RADIUS = 40
+    TAB_MATCH_DIFF = 12
+    
     def __init__(self, device_id=None):
-        self.adb = ADBController(device_id)
-        # ... rest of the code ...
         self.controller = ADBController(device_id)
+        
+        # Battles tab as seen on the last successful reset (None until then)
+        self._tab_patch = None
+    
+    def _load_coords(self):
+        """
+        Read and check every tap target of the reset flow
+        
+        Returns:
+            (coords dict, optional stability region, optional game package)
+        """
+        config = load_adb_config(config_path_for(self.controller.device))
+        if not config:
+            raise Exception("adb_config.json missing or unreadable")
+        
+        coords = {
+            "pokemon_app_icon": tuple(config.get("pokemon_app_icon", (0, 0))),
+            "battles_tab": tuple(config.get("battles_tab", (0, 0))),
+            "solo_battle_button": tuple(config.get("solo_battle_button", (0, 0))),
+            "beginner": tuple(config.get("difficulty_buttons", {}).get("beginner", (0, 0))),
+        }
+        
+        # App icon is optional (skipped if missing) - the rest can't be
+        missing = [key for key, pos in coords.items() if pos == (0, 0) and key != "pokemon_app_icon"]
+        if missing:
+            raise Exception(f"Coordinates not calibrated: {', '.join(missing)}")
+        
+        return coords, config.get("stability_roi"), config.get("pokemon_package")
+    
+    def _tab_region(self, pos):
+        """(x, y, width, height) box around the Battles tab"""
+        x, y = pos
+        radius = self.TAB_PATCH_RADIUS
+        return (max(x - radius, 0), max(y - radius, 0), 2 * radius, 2 * radius)
+    
+    def _wait_for_battles_tab(self, pos, timeout=30, step=0.5):
+        """
+        Poll until the Battles tab looks like it did on the last successful reset
+        
+        Args:
+            pos: Battles tab coordinates
+            timeout: Max seconds to wait
+            step: Seconds between captures
+        
+        Returns:
+            True if the tab showed up, False on timeout
+        """
+        region = self._tab_region(pos)
+        deadline = time.time() + timeout
+        
+        while time.time() < deadline:
+            patch = self.controller.screenshot_cv(region=region)
+            if (patch.shape == self._tab_patch.shape
+                    and cv2.absdiff(patch, self._tab_patch).mean() < self.TAB_MATCH_DIFF):
+                return True
+            time.sleep(step)
+        return False
     
-    def run_universal_reset(self):
+    def run_universal_reset(self, force_reset=False):
         """
         Universal reset flow to get back to Beginner battle screen
         Uses generous delays between major actions to ensure loading
+        
+        If config has "pokemon_package", the game is restarted directly instead
+        of pressing BACK 70 times and tapping the app icon, then the reset waits
+        for the Battles tab as it looked on the last successful reset (a fixed
+        15s on the first one)
+        
+        Args:
+            force_reset: Always use the BACK presses + app icon (e.g. if a restart gets stuck)
         """
         print("\n--- Executing Universal Reset Flow (SLOW & SAFE) ---")
-        time.sleep(2)
-        
-        # Step 1: Press BACK 70 times to ensure all menus closed
-        print("\n[Step 1/6] Pressing BACK 70 times to close all menus...")
-        for i in range(70):
-            self.controller.press_back(delay=0.3)
-            if (i + 1) % 10 == 0:
-                print(f"  BACK {i+1}/70")
-        print("✓ All menus closed")
         
         try:
-            import json
-            with open('adb_config.json', 'r') as f:
-                config = json.load(f)
+            # Check every tap target first - a missing one fails now,
+            # not after 20s of BACK presses and a tap at (0, 0)
+            coords, roi, package = self._load_coords()
+            time.sleep(2)
             
-            # Step 2: Click Pokemon TCG app icon
-            print("\n[Step 2/6] Clicking Pokemon TCG app icon...")
-            app_icon = tuple(config.get("pokemon_app_icon", (0, 0)))
-            if app_icon != (0, 0):
-                self.controller.tap(*app_icon)
-                print("✓ App icon clicked")
+            if package and not force_reset:
+                # Steps 1-2: Restart the game by package - opens on its start screen,
+                # no BACK presses or icon tap needed
+                print(f"\n[Step 1-2/6] Restarting {package}...")
+                self.controller.launch_app(package, restart=True)
+                print("✓ Game restarted")
+                
+                # Cold start shows static splash/loading screens, so "screen stopped
+                # changing" doesn't mean loaded - wait for the Battles tab itself
+                if self._tab_patch is not None:
+                    print("  Waiting up to 30 seconds for the Battles tab...")
+                    if self._wait_for_battles_tab(coords["battles_tab"]):
+                        print("✓ Battles tab visible")
+                    else:
+                        print("⚠️ Battles tab not seen, continuing anyway")
+                else:
+                    # First reset of this run - no tab to compare against yet
+                    print("  Waiting 15 seconds for app to load...")
+                    time.sleep(15)
             else:
-                print("⚠️ App icon not calibrated, skipping...")
+                # Step 1: Press BACK 70 times to ensure all menus closed
+                # One device-side loop instead of 70 separate input calls (same 0.3s pacing)
+                print("\n[Step 1/6] Pressing BACK 70 times to close all menus...")
+                self.controller.shell_batch(
+                    "i=0; while [ $i -lt 70 ]; do input keyevent 4; sleep 0.3; i=$((i+1)); done"
+                )
+                print("✓ All menus closed")
+                
+                # Step 2: Click Pokemon TCG app icon
+                print("\n[Step 2/6] Clicking Pokemon TCG app icon...")
+                if coords["pokemon_app_icon"] != (0, 0):
+                    self.controller.tap(*coords["pokemon_app_icon"])
+                    print("✓ App icon clicked")
+                    
+                    # Wait for app to fully load - at least 2s so a static splash screen isn't "ready"
+                    print("  Waiting up to 5 seconds for app to load...")
+                    self.controller.wait_until_stable(roi, timeout=5, step=0.15, min_wait=2)
+                else:
+                    print("⚠️ App icon not calibrated, skipping...")
             
-            # Wait for app to fully load
-            print("  Waiting 5 seconds for app to load...")
-            time.sleep(5)
+            # Each wait below ends as soon as the screen stops changing (old sleep = timeout),
+            # but not before half of it after a tap - the tap may not have shown yet
             
             # Step 3: Click Battles tab
+            # Kept as the tab signature once this reset succeeds
+            tab_patch = self.controller.screenshot_cv(region=self._tab_region(coords["battles_tab"]))
+            
             print("\n[Step 3/6] Clicking BATTLES tab...")
-            battles_tab = tuple(config.get("battles_tab", (0, 0)))
-            self.controller.tap(*battles_tab)
+            self.controller.tap(*coords["battles_tab"])
             print("✓ Battles tab clicked")
             
             # Wait for battles screen to load
-            print("  Waiting 5 seconds...")
-            time.sleep(5)
+            print("  Waiting up to 5 seconds...")
+            self.controller.wait_until_stable(roi, timeout=5, step=0.15, min_wait=2.5)
             
             # Step 4: Click Solo Battle
             print("\n[Step 4/6] Clicking SOLO BATTLE...")
-            solo_battle = tuple(config.get("solo_battle_button", (0, 0)))
-            self.controller.tap(*solo_battle)
+            self.controller.tap(*coords["solo_battle_button"])
             print("✓ Solo Battle clicked")
             
             # Wait for solo battle screen to load
-            print("  Waiting 5 seconds...")
-            time.sleep(5)
+            print("  Waiting up to 5 seconds...")
+            self.controller.wait_until_stable(roi, timeout=5, step=0.15, min_wait=2.5)
             
             # Step 5: NO SCROLL - Beginner is already visible!
             print("\n[Step 5/6] Beginner difficulty already visible (no scroll needed)")
             print("✓ Ready to click Beginner")
             
             # Wait after "scrolling" (keeping timing consistent)
-            print("  Waiting 3 seconds...")
-            time.sleep(3)
+            print("  Waiting up to 3 seconds...")
+            self.controller.wait_until_stable(roi, timeout=3, step=0.15)
             
             # Step 6: Click Beginner
             print("\n[Step 6/6] Clicking BEGINNER...")
-            difficulty_buttons = config.get("difficulty_buttons", {})
-            beginner = tuple(difficulty_buttons.get("beginner", (0, 0)))
-            self.controller.tap(*beginner)
+            self.controller.tap(*coords["beginner"])
             print("✓ Beginner clicked")
             
             # Final delay to ensure we're ready
-            print("  Waiting 3 seconds for final load...")
-            time.sleep(3)
+            print("  Waiting up to 3 seconds for final load...")
+            self.controller.wait_until_stable(roi, timeout=3, step=0.15, min_wait=1.5)
+            
+            self._tab_patch = tab_patch
             
             print("\n" + "="*60)
             print("✓ UNIVERSAL RESET FLOW COMPLETED")
@@ -101,6 +194,11 @@ class UniversalResetADB:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Pokemon TCG ADB - Universal Reset")
+    parser.add_argument("--force-reset", action="store_true",
+                        help="Use BACK presses + app icon even if pokemon_package is configured")
+    args = parser.parse_args()
+    
     print("="*60)
     print("POKEMON TCG ADB - TEST 07: UNIVERSAL RESET")
     print("="*60)
@@ -111,7 +209,7 @@ def main():
     input("\nPress ENTER to start reset...")
     
     resetter = UniversalResetADB()
-    resetter.run_universal_reset()
+    resetter.run_universal_reset(force_reset=args.force_reset)
 
 
 if __name__ == "__main__":